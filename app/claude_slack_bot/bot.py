@@ -1,19 +1,38 @@
+import asyncio
 import logging
+import re
+import threading
 from typing import Any
 
 from claude_agent_sdk import CLINotFoundError
 from markdown_to_mrkdwn import SlackMarkdownConverter
 from slack_bolt.async_app import AsyncApp
+from slack_bolt.context.ack.async_ack import AsyncAck
+from slack_bolt.context.async_context import AsyncBoltContext
 from slack_bolt.context.say.async_say import AsyncSay
+from slack_sdk.web.async_slack_response import AsyncSlackResponse
 
 from claude_slack_bot.claude_runner import ClaudeResult, run_claude
 from claude_slack_bot.config import Config
-from claude_slack_bot.session import SessionQueue, SessionStore
+from claude_slack_bot.session import EventDeduplicator, SessionQueue, SessionStore
 
 EYES_EMOJI: str = "eyes"
+STREAM_FLUSH_INTERVAL_SECONDS: float = 1.0
+SLACK_MAX_MESSAGE_BYTES: int = 40_000
+TRUNCATION_MARKER: str = "\n… (truncated)"
+STREAM_IDLE_TIMEOUT_SECONDS: float = 60.0
 
 logger: logging.Logger = logging.getLogger(__name__)
 
+# Characters that can trigger a markdown-to-mrkdwn rewrite; text without any
+# of them converts to itself (modulo surrounding whitespace).
+MARKDOWN_SYNTAX_PATTERN: re.Pattern[str] = re.compile(r"[*_`#\[\]>~|!-]")
+
+# Converters are built once per worker thread: construction compiles the
+# regex table, and ``convert`` keeps per-call state that must not be shared
+# between threads.
+_converter_local: threading.local = threading.local()
+
 
 def register_handlers(
     app: AsyncApp,
@@ -33,6 +52,13 @@ def register_handlers(
             Claude invocations.
     """
 
+    allowed_user_ids: frozenset[str] = config.allowed_user_ids
+    seen_events: EventDeduplicator = EventDeduplicator()
+    # Strong references to fire-and-forget tasks so they are not collected
+    # before they finish.
+    background_tasks: set[asyncio.Task[None]] = set()
+    bot_mention: str = ""
+
     async def _dispatch(
         event: dict[str, Any],
         say: AsyncSay,
@@ -41,6 +67,9 @@ def register_handlers(
         """
         Validate the user and enqueue a Claude job for the session.
 
+        Events without a user and messages that were already dispatched
+        (e.g. Slack retries) are ignored.
+
         Args:
             event (dict[str, Any]): The Slack event payload.
             say (AsyncSay): Slack's say utility for posting messages.
@@ -48,10 +77,20 @@ def register_handlers(
         """
 
         user_id: str = event.get("user", "")
+
+        if not user_id:
+            return
+
         channel: str = event.get("channel", "")
         thread_ts: str = event.get("thread_ts", event.get("ts", ""))
+        message_ts: str = event.get("ts", "")
+
+        if message_ts and seen_events.check_and_add(channel, message_ts):
+            logger.info("Ignoring duplicate event for message %s", message_ts)
 
-        if user_id not in config.allowed_user_ids:
+            return
+
+        if user_id not in allowed_user_ids:
             logger.warning("Unauthorized message from user %s", user_id)
             await say(
                 "Sorry, you're not authorized to use this bot.",
@@ -68,53 +107,84 @@ def register_handlers(
 
             return
 
-        logger.info("Received prompt from %s: %s", user_id, prompt)
-        message_ts: str = event.get("ts", "")
-        await _react(app, channel, message_ts, EYES_EMOJI)
-
-        async def _job() -> None:
-            await _run_claude(
-                app,
-                config,
-                session_store,
-                prompt,
-                channel,
-                thread_ts,
+        logger.info("Received prompt from %s: %.200s", user_id, prompt)
+        accepted: bool = await session_queue.enqueue(
+            channel,
+            thread_ts,
+            _run_claude(app, config, session_store, prompt, channel, thread_ts),
+        )
+
+        if not accepted:
+            logger.warning("Queue full for thread %s in %s", thread_ts, channel)
+            await say(
+                "I'm still working on previous requests — try again shortly.",
+                thread_ts=thread_ts,
             )
 
-        await session_queue.enqueue(channel, thread_ts, _job)
+            return
+
+        reaction: asyncio.Task[None] = asyncio.create_task(
+            _react(app, channel, message_ts, EYES_EMOJI),
+        )
+        background_tasks.add(reaction)
+        reaction.add_done_callback(background_tasks.discard)
 
     @app.event("app_mention")
-    async def handle_mention(event: dict[str, Any], say: AsyncSay) -> None:
+    async def handle_mention(
+        event: dict[str, Any],
+        say: AsyncSay,
+        ack: AsyncAck,
+        context: AsyncBoltContext,
+    ) -> None:
         """
         Handle an @mention event from a channel.
 
+        With the default ``process_before_response=False`` Bolt acks the
+        event before this listener runs, so the explicit ``ack`` is only a
+        safeguard: it keeps the ack first if the app is ever switched to
+        ``process_before_response=True``.
+
         Args:
             event (dict[str, Any]): The Slack event payload.
             say (AsyncSay): Slack's say utility for posting messages.
+            ack (AsyncAck): Slack's acknowledgement utility.
+            context (AsyncBoltContext): Bolt's request context, carrying
+                the bot user ID resolved at authorization time.
         """
 
+        nonlocal bot_mention
+
+        await ack()
+
+        if not bot_mention and context.bot_user_id:
+            bot_mention = f"<@{context.bot_user_id}>"
+
         text: str = event.get("text", "")
-        prompt: str = text.split(">", 1)[-1].strip()
+        prompt: str = _extract_mention_prompt(text, bot_mention)
 
         await _dispatch(event, say, prompt)
 
-    @app.event("message")
-    async def handle_direct_message(event: dict[str, Any], say: AsyncSay) -> None:
+    @app.event("message", matchers=[_is_user_direct_message])
+    async def handle_direct_message(
+        event: dict[str, Any],
+        say: AsyncSay,
+        ack: AsyncAck,
+    ) -> None:
         """
         Handle a direct message to the bot.
 
+        Channel messages and subtyped events (edits, bot messages, file
+        shares) are filtered out by the listener matcher before this runs.
+        As in ``handle_mention``, the explicit ``ack`` only matters when
+        ``process_before_response=True``.
+
         Args:
             event (dict[str, Any]): The Slack event payload.
             say (AsyncSay): Slack's say utility for posting messages.
+            ack (AsyncAck): Slack's acknowledgement utility.
         """
 
-        if event.get("channel_type") != "im":
-            return
-
-        if event.get("subtype") is not None:
-            return
-
+        await ack()
         prompt: str = event.get("text", "").strip()
 
         await _dispatch(event, say, prompt)
@@ -122,6 +192,149 @@ def register_handlers(
     return
 
 
+async def _is_user_direct_message(event: dict[str, Any]) -> bool:
+    """
+    Match plain user messages sent to the bot in a direct message channel.
+
+    Args:
+        event (dict[str, Any]): The Slack event payload.
+
+    Returns:
+        bool: True for subtype-less messages in an ``im`` channel.
+    """
+
+    return event.get("channel_type") == "im" and event.get("subtype") is None
+
+
+def _extract_mention_prompt(text: str, bot_mention: str) -> str:
+    """
+    Strip the leading bot mention from a message to obtain the prompt.
+
+    Args:
+        text (str): The raw message text, e.g. ``<@U123> fix the bug``.
+        bot_mention (str): The bot's mention token (empty if unknown).
+
+    Returns:
+        str: The prompt with the mention and surrounding whitespace removed.
+    """
+
+    if bot_mention and text.startswith(bot_mention):
+        return text[len(bot_mention) :].strip()
+
+    return text.split(">", 1)[-1].strip()
+
+
+class _ProgressReply:
+    """
+    A Slack message that shows a Claude run's progress and then its result.
+
+    Streamed assistant text is buffered and flushed by a background task at
+    most every ``STREAM_FLUSH_INTERVAL_SECONDS``: the first flush posts the
+    message, later ones update it in place, and text pushed between flushes
+    is coalesced so only the latest is sent.  The task exits when the run
+    finishes or after ``STREAM_IDLE_TIMEOUT_SECONDS`` without new text.
+    """
+
+    def __init__(
+        self,
+        app: AsyncApp,
+        channel: str,
+        thread_ts: str,
+        max_length: int,
+    ) -> None:
+        """
+        Initialize a progress reply that has not been posted yet.
+
+        Args:
+            app (AsyncApp): The async Slack Bolt app instance.
+            channel (str): The Slack channel ID.
+            thread_ts (str): The thread timestamp to reply in.
+            max_length (int): Maximum message length before truncation.
+        """
+
+        self._app: AsyncApp = app
+        self._channel: str = channel
+        self._thread_ts: str = thread_ts
+        self._max_length: int = max_length
+        self._ts: str | None = None
+        self._pending: str | None = None
+        self._done: asyncio.Event = asyncio.Event()
+        self._flusher: asyncio.Task[None] | None = None
+
+    async def push(self, text: str) -> None:
+        """
+        Buffer streamed text for the next flush.
+
+        Args:
+            text (str): The text of the latest assistant message.
+        """
+
+        self._pending = text
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def finish(self, text: str) -> None:
+        """
+        Stop streaming and show the final text.
+
+        Any buffered progress is discarded, an in-flight flush is allowed to
+        complete, and the final text replaces the progress message (or is
+        posted if none was sent).
+
+        Args:
+            text (str): The final message text, already formatted.
+        """
+
+        self._pending = None
+        self._done.set()
+
+        if self._flusher is not None:
+            await self._flusher
+
+        await self._send(text)
+
+    async def _flush_periodically(self) -> None:
+        """
+        Flush buffered text until the run finishes or goes idle.
+        """
+
+        idle_seconds: float = 0.0
+
+        while idle_seconds < STREAM_IDLE_TIMEOUT_SECONDS:
+            if self._pending is not None:
+                text: str = self._pending
+                self._pending = None
+                idle_seconds = 0.0
+
+                await self._send(await _format_markdown(text, self._max_length))
+            else:
+                idle_seconds += STREAM_FLUSH_INTERVAL_SECONDS
+
+            try:
+                await asyncio.wait_for(
+                    self._done.wait(),
+                    timeout=STREAM_FLUSH_INTERVAL_SECONDS,
+                )
+            except TimeoutError:
+                continue
+
+            return
+
+    async def _send(self, text: str) -> None:
+        """
+        Post the message on first use and update it afterwards.
+
+        Args:
+            text (str): The message text.
+        """
+
+        if self._ts is None:
+            self._ts = await _post(self._app, self._channel, self._thread_ts, text)
+        else:
+            await _update(self._app, self._channel, self._ts, text)
+
+
 async def _run_claude(
     app: AsyncApp,
     config: Config,
@@ -133,6 +346,10 @@ async def _run_claude(
     """
     Run Claude Code via the SDK and post the result back to Slack.
 
+    Assistant text is streamed into a single progress message, which the
+    final result then replaces.  The run is cancelled if it exceeds
+    ``config.claude_timeout_seconds``.
+
     Args:
         app (AsyncApp): The async Slack Bolt app instance for posting messages.
         config (Config): Application configuration.
@@ -143,48 +360,60 @@ async def _run_claude(
         thread_ts (str): The thread timestamp to reply in.
     """
 
-    logger.info("Starting Claude Code with prompt: %s", prompt)
+    logger.info("Starting Claude Code with prompt: %.200s", prompt)
     existing_session: str | None = session_store.get(channel, thread_ts)
+    progress: _ProgressReply = _ProgressReply(
+        app,
+        channel,
+        thread_ts,
+        config.max_slack_message_length,
+    )
 
     try:
-        result: ClaudeResult = await run_claude(
-            prompt=prompt,
-            project_path=config.project_path,
-            model=config.claude_model,
-            max_turns=config.max_turns,
-            cli_path=config.claude_cli_path,
-            session_id=existing_session or "",
-        )
+        async with asyncio.timeout(config.claude_timeout_seconds or None):
+            result: ClaudeResult = await run_claude(
+                prompt=prompt,
+                project_path=config.project_path,
+                model=config.claude_model,
+                max_turns=config.max_turns,
+                cli_path=config.claude_cli_path,
+                session_id=existing_session or "",
+                on_text=progress.push,
+            )
 
         if result.session_id:
             session_store.set(channel, thread_ts, result.session_id)
 
-        response: str = _format_response(result, config.max_slack_message_length)
+        response: str = await _format_response(
+            result,
+            config.max_slack_message_length,
+        )
         logger.info("Claude finished successfully")
 
-        await _post(app, channel, thread_ts, response)
+        await progress.finish(response)
+
+    except TimeoutError:
+        logger.warning(
+            "Claude timed out after %g seconds",
+            config.claude_timeout_seconds,
+        )
 
+        await progress.finish(
+            f"⏱️ Claude timed out after {config.claude_timeout_seconds:g} seconds.",
+        )
     except CLINotFoundError:
         logger.error("Claude CLI not found — is Claude Code installed?")
 
-        await _post(
-            app,
-            channel,
-            thread_ts,
+        await progress.finish(
             "❌ Claude CLI not found. Is Claude Code installed and on PATH?",
         )
     except Exception:
         logger.exception("Unexpected error running Claude")
 
-        await _post(
-            app,
-            channel,
-            thread_ts,
-            "❌ An unexpected error occurred. Check the bot logs.",
-        )
+        await progress.finish("❌ An unexpected error occurred. Check the bot logs.")
 
 
-def _format_response(result: ClaudeResult, max_length: int) -> str:
+async def _format_response(result: ClaudeResult, max_length: int) -> str:
     """
     Format a ClaudeResult into a Slack-compatible mrkdwn message.
 
@@ -196,20 +425,99 @@ def _format_response(result: ClaudeResult, max_length: int) -> str:
         str: Formatted Slack mrkdwn message.
     """
 
-    output: str = result.output[:max_length]
-
     if result.is_error:
+        output: str = result.output[:max_length]
+
         return f"⚠️ Claude encountered an error:\n```{output}```"
 
-    if len(result.output) > max_length:
-        output += "\n… (truncated)"
+    return await _format_markdown(result.output, max_length)
+
+
+async def _format_markdown(text: str, max_length: int) -> str:
+    """
+    Truncate markdown text and convert it to Slack mrkdwn.
+
+    The conversion is regex-heavy, so it only ever sees the truncated text,
+    is skipped for plain text, and runs in a worker thread to keep the
+    event loop responsive.
+
+    Args:
+        text (str): The markdown text to format.
+        max_length (int): Maximum message length before truncation.
+
+    Returns:
+        str: Formatted Slack mrkdwn message.
+    """
+
+    output: str = text
+
+    if len(text) > max_length:
+        output = text[:max_length] + TRUNCATION_MARKER
+
+    if MARKDOWN_SYNTAX_PATTERN.search(output) is None:
+        return output.strip()
+
+    converted: str = await asyncio.to_thread(_convert_markdown, output)
+
+    return converted
+
+
+def _convert_markdown(text: str) -> str:
+    """
+    Convert markdown to Slack mrkdwn with a converter owned by this thread.
+
+    Args:
+        text (str): The markdown text to convert.
+
+    Returns:
+        str: The converted Slack mrkdwn text.
+    """
+
+    converter: SlackMarkdownConverter | None = getattr(
+        _converter_local,
+        "converter",
+        None,
+    )
+
+    if converter is None:
+        converter = SlackMarkdownConverter()
+        _converter_local.converter = converter
 
-    converter: SlackMarkdownConverter = SlackMarkdownConverter()
-    converted: str = converter.convert(output)
+    converted: str = converter.convert(text)
 
     return converted
 
 
+def _fit_slack_limit(text: str) -> str:
+    """
+    Truncate text so its UTF-8 encoding fits Slack's message size limit.
+
+    Markdown conversion can grow a message past the character-based
+    truncation in ``_format_markdown``, and non-ASCII text takes several
+    bytes per character, so the final payload is checked in bytes.
+
+    Args:
+        text (str): The message text.
+
+    Returns:
+        str: The text, cut at a character boundary with a truncation marker
+            if it was too large.
+    """
+
+    # A UTF-8 character is at most 4 bytes, so short text cannot exceed it.
+    if len(text) * 4 <= SLACK_MAX_MESSAGE_BYTES:
+        return text
+
+    encoded: bytes = text.encode("utf-8")
+
+    if len(encoded) <= SLACK_MAX_MESSAGE_BYTES:
+        return text
+
+    limit: int = SLACK_MAX_MESSAGE_BYTES - len(TRUNCATION_MARKER.encode("utf-8"))
+
+    return encoded[:limit].decode("utf-8", errors="ignore") + TRUNCATION_MARKER
+
+
 async def _react(
     app: AsyncApp,
     channel: str,
@@ -241,7 +549,7 @@ async def _post(
     channel: str,
     thread_ts: str,
     text: str,
-) -> None:
+) -> str | None:
     """
     Post a message to a Slack channel in a specific thread.
 
@@ -250,13 +558,48 @@ async def _post(
         channel (str): The Slack channel ID.
         thread_ts (str): The thread timestamp to reply in.
         text (str): The message text.
+
+    Returns:
+        str | None: The timestamp of the posted message, or None on failure.
     """
 
     try:
-        await app.client.chat_postMessage(
+        response: AsyncSlackResponse = await app.client.chat_postMessage(
             channel=channel,
-            text=text,
+            text=_fit_slack_limit(text),
             thread_ts=thread_ts,
         )
     except Exception:
         logger.exception("Failed to post message to Slack channel %s", channel)
+
+        return None
+
+    ts: str | None = response.get("ts")
+
+    return ts
+
+
+async def _update(
+    app: AsyncApp,
+    channel: str,
+    ts: str,
+    text: str,
+) -> None:
+    """
+    Replace the text of a previously posted Slack message.
+
+    Args:
+        app (AsyncApp): The async Slack Bolt app instance.
+        channel (str): The Slack channel ID.
+        ts (str): The timestamp of the message to update.
+        text (str): The new message text.
+    """
+
+    try:
+        await app.client.chat_update(
+            channel=channel,
+            ts=ts,
+            text=_fit_slack_limit(text),
+        )
+    except Exception:
+        logger.exception("Failed to update message in Slack channel %s", channel)
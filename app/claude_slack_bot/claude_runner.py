@@ -1,25 +1,76 @@
+import ast
+import inspect
+import json
 import logging
+import textwrap
+import types
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
 from typing import Any
 
 from claude_agent_sdk import (
+    AssistantMessage,
     ClaudeAgentOptions,
     Message,
     ResultMessage,
     SystemMessage,
+    TextBlock,
     query,
 )
 from claude_agent_sdk._errors import MessageParseError
 from claude_agent_sdk._internal import client as _sdk_client
 from claude_agent_sdk._internal import message_parser as _sdk_parser
+from claude_agent_sdk._internal.transport import subprocess_cli as _sdk_transport
 
 SESSION_ID_INIT_SUBTYPE: str = "init"
 
+# Options shared by every invocation; only the per-call fields vary.
+_BASE_OPTIONS_KWARGS: dict[str, Any] = {"permission_mode": "bypassPermissions"}
+
 logger: logging.Logger = logging.getLogger(__name__)
 
 _original_parse_message = _sdk_parser.parse_message
 
 
+def _known_message_types() -> frozenset[str] | None:
+    """
+    Collect the message types the SDK's ``parse_message`` can handle.
+
+    The types are read from the ``case`` arms of the ``match message_type``
+    statement in the SDK source, so the set follows SDK upgrades.
+
+    Returns:
+        frozenset[str] | None: The known message types, or None if the SDK
+            source is unavailable or no longer has the expected shape.
+    """
+
+    try:
+        source: str = textwrap.dedent(inspect.getsource(_original_parse_message))
+    except (OSError, TypeError):
+        return None
+
+    for node in ast.walk(ast.parse(source)):
+        if (
+            isinstance(node, ast.Match)
+            and isinstance(node.subject, ast.Name)
+            and node.subject.id == "message_type"
+        ):
+            message_types: frozenset[str] = frozenset(
+                case.pattern.value.value
+                for case in node.cases
+                if isinstance(case.pattern, ast.MatchValue)
+                and isinstance(case.pattern.value, ast.Constant)
+                and isinstance(case.pattern.value.value, str)
+            )
+
+            return message_types or None
+
+    return None
+
+
+_KNOWN_MESSAGE_TYPES: frozenset[str] | None = _known_message_types()
+
+
 def _patched_parse_message(data: dict[str, Any]) -> Message:
     """
     Wrap the SDK's ``parse_message`` to gracefully handle unknown message types.
@@ -28,8 +79,9 @@ def _patched_parse_message(data: dict[str, Any]) -> Message:
     not recognise (e.g. ``rate_limit_event``).  Because ``parse_message`` is
     called *inside* the ``process_query`` async generator, the exception kills
     the generator and the underlying subprocess transport.  This wrapper
-    catches the error and returns a ``SystemMessage`` placeholder so the
-    stream stays alive.
+    returns a ``SystemMessage`` placeholder instead so the stream stays alive.
+    Types missing from ``_KNOWN_MESSAGE_TYPES`` are short-circuited without
+    calling the parser; anything else that fails to parse is caught.
 
     Args:
         data (dict[str, Any]): Raw message dict from the CLI stream.
@@ -39,24 +91,77 @@ def _patched_parse_message(data: dict[str, Any]) -> Message:
             unknown types.
     """
 
-    try:
-        return _original_parse_message(data)
-    except MessageParseError:
-        is_dict: bool = isinstance(data, dict)
-        message_type: str = data.get("type", "unknown") if is_dict else "unknown"
+    is_dict: bool = isinstance(data, dict)
+    message_type: str = data.get("type", "unknown") if is_dict else "unknown"
 
-        logger.debug("SDK ignoring unknown message type: %s", message_type)
+    if _KNOWN_MESSAGE_TYPES is None or message_type in _KNOWN_MESSAGE_TYPES:
+        try:
+            return _original_parse_message(data)
+        except MessageParseError:
+            pass
 
-        return SystemMessage(
-            subtype=message_type,
-            data=data if is_dict else {},
-        )
+    logger.debug("SDK ignoring unknown message type: %s", message_type)
+
+    return SystemMessage(
+        subtype=message_type,
+        data=data if is_dict else {},
+    )
 
 
 _sdk_parser.parse_message = _patched_parse_message
 _sdk_client.parse_message = _patched_parse_message  # type: ignore[attr-defined]
 
 
+def _install_fast_json() -> bool:
+    """
+    Decode the SDK's CLI stream with ``orjson`` when it is installed.
+
+    The subprocess transport calls ``json.loads`` on every streamed line.
+    Its module-level ``json`` reference is swapped for a namespace whose
+    ``loads`` tries ``orjson`` first.  ``orjson`` rejects some input the
+    stdlib accepts, notably lone-surrogate escapes that ``JSON.stringify``
+    emits when the CLI cuts a string mid-emoji, so a buffer that looks like
+    a complete object is retried with ``json.loads``.  Partial chunks, which
+    the SDK re-parses after every read, are not retried and stay a single
+    decode.  Every other attribute keeps its stdlib behaviour, and
+    ``orjson``'s decode error subclasses ``json.JSONDecodeError``, so the
+    SDK's handling of partial lines is unchanged.
+
+    Returns:
+        bool: True if the fast decoder was installed, False otherwise.
+    """
+
+    try:
+        import orjson
+    except ImportError:
+        return False
+
+    if getattr(_sdk_transport, "json", None) is not json:
+        logger.debug("SDK transport no longer uses stdlib json, not patching")
+
+        return False
+
+    def _loads(data: str) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            if not data.rstrip().endswith("}"):
+                raise
+
+            return json.loads(data)
+
+    fast_json: types.SimpleNamespace = types.SimpleNamespace(
+        **{name: getattr(json, name) for name in json.__all__},
+    )
+    fast_json.loads = _loads
+    setattr(_sdk_transport, "json", fast_json)  # noqa: B010
+
+    return True
+
+
+_FAST_JSON_INSTALLED: bool = _install_fast_json()
+
+
 @dataclass(frozen=True)
 class ClaudeResult:
     """
@@ -84,10 +189,14 @@ async def run_claude(
     max_turns: int = 0,
     cli_path: str = "",
     session_id: str = "",
+    on_text: Callable[[str], Awaitable[None]] | None = None,
 ) -> ClaudeResult:
     """
     Run Claude Code via the Agent SDK and return the result.
 
+    Assistant text is handed to ``on_text`` as it streams in, so callers can
+    show progress before the final result is available.
+
     Args:
         prompt (str): The user's prompt to pass to Claude.
         project_path (str): Working directory for Claude Code.
@@ -95,13 +204,15 @@ async def run_claude(
         max_turns (int): Maximum agentic turns (0 for unlimited).
         cli_path (str): Path to the Claude CLI binary (empty to use bundled).
         session_id (str): Optional session ID to resume a previous conversation.
+        on_text (Callable[[str], Awaitable[None]] | None): Optional async
+            callback receiving the text of each assistant message.
 
     Returns:
         ClaudeResult: The parsed result from Claude Code.
     """
 
     options: ClaudeAgentOptions = ClaudeAgentOptions(
-        permission_mode="bypassPermissions",
+        **_BASE_OPTIONS_KWARGS,
         cwd=project_path,
         model=model or None,
         max_turns=max_turns if max_turns > 0 else None,
@@ -112,6 +223,9 @@ async def run_claude(
     result: ClaudeResult | None = None
     captured_session_id: str = ""
 
+    # No prefetch wrapper here: the SDK already reads the CLI's output in a
+    # background task, and ``query`` must be iterated from this task because
+    # it enters and exits an anyio task group across its ``__anext__`` calls.
     async for message in query(prompt=prompt, options=options):
         if (
             isinstance(message, SystemMessage)
@@ -119,6 +233,12 @@ async def run_claude(
         ):
             captured_session_id = message.data.get("session_id", "")
 
+        if on_text is not None and isinstance(message, AssistantMessage):
+            text: str = _assistant_text(message)
+
+            if text:
+                await on_text(text)
+
         if isinstance(message, ResultMessage):
             output: str = message.result or "Done, no output."
             captured_session_id = message.session_id or captured_session_id
@@ -141,3 +261,19 @@ async def run_claude(
         duration_ms=0,
         session_id=captured_session_id,
     )
+
+
+def _assistant_text(message: AssistantMessage) -> str:
+    """
+    Join the text blocks of an assistant message.
+
+    Args:
+        message (AssistantMessage): The assistant message to read.
+
+    Returns:
+        str: The concatenated text, or an empty string if there is none.
+    """
+
+    return "\n\n".join(
+        block.text for block in message.content if isinstance(block, TextBlock)
+    ).strip()
@@ -18,6 +18,10 @@ class Config:
         max_slack_message_length (int): Maximum characters before truncation.
         claude_model (str): Optional Claude model override.
         claude_cli_path (str): Path to the Claude CLI binary (empty to use bundled).
+        claude_timeout_seconds (float): Maximum duration of a Claude run in
+            seconds (0 for unlimited).
+        max_queue_depth (int): Maximum pending or running jobs per Slack
+            thread before new prompts are turned away.
     """
 
     slack_bot_token: str
@@ -28,12 +32,17 @@ class Config:
     max_slack_message_length: int = 2900
     claude_model: str = ""
     claude_cli_path: str = ""
+    claude_timeout_seconds: float = 0.0
+    max_queue_depth: int = 4
 
     @classmethod
     def from_env(cls, project_path: str) -> Config:
         """
         Build a Config by reading environment variables and a CLI-provided project path.
 
+        ``SLACK_ADMIN_USER`` is accepted as a legacy alias for
+        ``SLACK_ALLOWED_USERS``.
+
         Args:
             project_path (str): Working directory where Claude Code will run.
 
@@ -42,13 +51,17 @@ class Config:
 
         Raises:
             OSError: If a required environment variable is missing.
-            ValueError: If SLACK_ALLOWED_USERS is empty.
+            ValueError: If SLACK_ALLOWED_USERS is empty or
+                CLAUDE_MAX_QUEUE_DEPTH is below 1.
         """
 
         slack_bot_token: str = _require_env("SLACK_BOT_TOKEN")
         slack_app_token: str = _require_env("SLACK_APP_TOKEN")
 
-        user_ids: str = _require_env("SLACK_ALLOWED_USERS")
+        user_ids: str = os.environ.get("SLACK_ALLOWED_USERS") or _require_env(
+            "SLACK_ADMIN_USER",
+            alias_of="SLACK_ALLOWED_USERS",
+        )
         allowed_user_ids: frozenset[str] = frozenset(
             uid.strip() for uid in user_ids.split(",") if uid.strip()
         )
@@ -59,6 +72,13 @@ class Config:
         max_turns: int = int(os.environ.get("CLAUDE_MAX_TURNS", "0"))
         claude_model: str = os.environ.get("CLAUDE_MODEL", "")
         claude_cli_path: str = os.environ.get("CLAUDE_CLI_PATH", "")
+        claude_timeout_seconds: float = float(
+            os.environ.get("CLAUDE_TIMEOUT_SECONDS", "0"),
+        )
+        max_queue_depth: int = int(os.environ.get("CLAUDE_MAX_QUEUE_DEPTH", "4"))
+
+        if max_queue_depth < 1:
+            raise ValueError("CLAUDE_MAX_QUEUE_DEPTH must be at least 1")
 
         return cls(
             slack_bot_token=slack_bot_token,
@@ -68,15 +88,19 @@ class Config:
             max_turns=max_turns,
             claude_model=claude_model,
             claude_cli_path=claude_cli_path,
+            claude_timeout_seconds=claude_timeout_seconds,
+            max_queue_depth=max_queue_depth,
         )
 
 
-def _require_env(key: str) -> str:
+def _require_env(key: str, alias_of: str = "") -> str:
     """
     Read and return a required environment variable.
 
     Args:
         key (str): The environment variable name.
+        alias_of (str): The preferred variable name when ``key`` is a
+            legacy alias, used in the error message.
 
     Returns:
         str: The variable's value.
@@ -88,6 +112,7 @@ def _require_env(key: str) -> str:
     value: str | None = os.environ.get(key)
 
     if not value:
-        raise OSError(f"Required environment variable '{key}' is not set")
+        name: str = alias_of or key
+        raise OSError(f"Required environment variable '{name}' is not set")
 
     return value
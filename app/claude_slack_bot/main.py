@@ -2,6 +2,8 @@ import argparse
 import asyncio
 import logging
 import sys
+from collections.abc import Coroutine
+from typing import Any
 
 from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
 from slack_bolt.async_app import AsyncApp
@@ -70,9 +72,12 @@ async def _async_main() -> None:
     )
 
     session_store: SessionStore = SessionStore()
-    session_queue: SessionQueue = SessionQueue()
+    session_queue: SessionQueue = SessionQueue(max_depth=config.max_queue_depth)
     app: AsyncApp = AsyncApp(token=config.slack_bot_token)
     register_handlers(app, config, session_store, session_queue)
+
+    # The aiohttp Socket Mode client runs every envelope in its own task, and
+    # handlers only enqueue Claude runs, so a slow run never delays others.
     handler: AsyncSocketModeHandler = AsyncSocketModeHandler(
         app,
         config.slack_app_token,
@@ -87,6 +92,26 @@ async def _async_main() -> None:
     finally:
         logger.info("Shutting down...")
         await handler.close_async()  # type: ignore[no-untyped-call]
+        await session_queue.close()
+
+
+def _run_event_loop(coro: Coroutine[Any, Any, None]) -> None:
+    """
+    Run a coroutine to completion, on uvloop when it is installed.
+
+    Args:
+        coro (Coroutine[Any, Any, None]): The coroutine to run.
+    """
+
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(coro)
+
+        return
+
+    logging.getLogger(__name__).info("Using uvloop event loop")
+    uvloop.run(coro)
 
 
 def main() -> None:
@@ -97,7 +122,7 @@ def main() -> None:
     _setup_logging()
 
     try:
-        asyncio.run(_async_main())
+        _run_event_loop(_async_main())
     except KeyboardInterrupt:
         pass
 
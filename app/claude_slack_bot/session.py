@@ -1,25 +1,61 @@
 import asyncio
 import logging
-from collections.abc import Awaitable, Callable
+import sys
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass, field
+from typing import Any
+
+KEY_SEPARATOR: str = "\x1f"
+IDLE_TIMEOUT_SECONDS: float = 30.0
+SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
+MAX_QUEUE_DEPTH: int = 4
+MAX_SESSIONS: int = 10_000
 
 logger: logging.Logger = logging.getLogger(__name__)
 
 
+def _session_key(channel: str, thread_ts: str) -> str:
+    """
+    Build the interned dictionary key for a Slack thread.
+
+    A single interned string hashes once and compares by identity on
+    repeat lookups, unlike a freshly allocated (channel, thread_ts) tuple.
+    The unit separator cannot occur in Slack IDs or timestamps.
+
+    Args:
+        channel (str): The Slack channel ID.
+        thread_ts (str): The Slack thread timestamp.
+
+    Returns:
+        str: The interned session key.
+    """
+
+    return sys.intern(channel + KEY_SEPARATOR + thread_ts)
+
+
 class SessionStore:
     """
     In-memory mapping of Slack threads to Claude session IDs.
 
     Each unique (channel, thread_ts) pair maps to a single Claude session,
-    allowing multi-turn conversations within a Slack thread.  No lock is
-    needed because the bot runs on a single asyncio event loop.
+    allowing multi-turn conversations within a Slack thread.  At most
+    ``max_sessions`` threads are remembered; the least recently used one
+    is forgotten first, since Claude expires old sessions anyway.  No lock
+    is needed because the bot runs on a single asyncio event loop.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, max_sessions: int = MAX_SESSIONS) -> None:
         """
         Initialize an empty session store.
+
+        Args:
+            max_sessions (int): Maximum number of threads remembered at once.
         """
 
-        self._sessions: dict[tuple[str, str], str] = {}
+        self._max_sessions: int = max_sessions
+        self._sessions: OrderedDict[str, str] = OrderedDict()
 
     def get(self, channel: str, thread_ts: str) -> str | None:
         """
@@ -33,7 +69,13 @@ class SessionStore:
             str | None: The session ID, or None if no session exists.
         """
 
-        return self._sessions.get((channel, thread_ts))
+        key: str = _session_key(channel, thread_ts)
+        session_id: str | None = self._sessions.get(key)
+
+        if session_id is not None:
+            self._sessions.move_to_end(key)
+
+        return session_id
 
     def set(self, channel: str, thread_ts: str, session_id: str) -> None:
         """
@@ -45,84 +87,278 @@ class SessionStore:
             session_id (str): The Claude session ID to store.
         """
 
-        self._sessions[(channel, thread_ts)] = session_id
+        key: str = _session_key(channel, thread_ts)
+        self._sessions[key] = session_id
+        self._sessions.move_to_end(key)
+
+        while len(self._sessions) > self._max_sessions:
+            self._sessions.popitem(last=False)
+
+
+class EventDeduplicator:
+    """
+    Bounded, time-limited record of Slack messages already dispatched.
+
+    Slack redelivers events that were not acknowledged in time, so the same
+    message can reach the handlers more than once.  Each message is
+    identified by its (channel, ts) pair; entries expire after ``ttl_seconds``
+    and the oldest are evicted once ``max_size`` is exceeded.
+    """
+
+    def __init__(self, ttl_seconds: float = 600.0, max_size: int = 10_000) -> None:
+        """
+        Initialize an empty deduplicator.
+
+        Args:
+            ttl_seconds (float): How long a message is remembered.
+            max_size (int): Maximum number of messages remembered at once.
+        """
+
+        self._ttl_seconds: float = ttl_seconds
+        self._max_size: int = max_size
+        self._seen: dict[tuple[str, str], float] = {}
+
+    def check_and_add(self, channel: str, ts: str) -> bool:
+        """
+        Record a message and report whether it had already been seen.
+
+        Args:
+            channel (str): The Slack channel ID.
+            ts (str): The Slack message timestamp.
+
+        Returns:
+            bool: True if the message was seen within the TTL, False otherwise.
+        """
+
+        now: float = time.monotonic()
+        self._evict_expired(now)
+
+        key: tuple[str, str] = (channel, ts)
+
+        if key in self._seen:
+            return True
+
+        while len(self._seen) >= self._max_size:
+            del self._seen[next(iter(self._seen))]
+
+        self._seen[key] = now + self._ttl_seconds
+
+        return False
+
+    def _evict_expired(self, now: float) -> None:
+        """
+        Drop entries whose TTL has elapsed.
+
+        Entries are kept in insertion order, so expired ones are always at
+        the front.
+
+        Args:
+            now (float): The current monotonic time.
+        """
+
+        while self._seen:
+            key: tuple[str, str] = next(iter(self._seen))
+
+            if self._seen[key] > now:
+                break
+
+            del self._seen[key]
+
+
+@dataclass(slots=True)
+class _Lane:
+    """
+    Queue state for one Slack thread, kept in a single record.
+
+    Attributes:
+        jobs (deque[Coroutine[Any, Any, None]]): Pending job coroutines,
+            oldest first.
+        wakeup (asyncio.Event): Set when a job is appended while the
+            consumer is idle.
+        running (bool): Whether the consumer is executing a job.
+        consumer (asyncio.Task[None] | None): The long-lived task draining
+            the jobs.
+    """
+
+    jobs: deque[Coroutine[Any, Any, None]] = field(default_factory=deque)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    running: bool = False
+    consumer: asyncio.Task[None] | None = None
 
 
 class SessionQueue:
     """
     Per-session async job queue ensuring serial execution within a session.
 
-    When a job is enqueued for a session key that has no active consumer,
-    a new consumer task is spawned.  The consumer pulls jobs one at a time,
-    guaranteeing that concurrent messages in the same Slack thread never
-    race on the same Claude session.  Idle queues are cleaned up
-    automatically once the consumer drains.
+    Each active session owns a lane with one long-lived consumer task that pulls jobs
+    one at a time, guaranteeing that concurrent messages in the same Slack
+    thread never race on the same Claude session.  Jobs sit in a plain
+    deque and an idle consumer parks on an event, so a burst of messages
+    in one thread reuses the same task instead of spawning a new one per
+    burst.  A consumer that stays idle for ``idle_timeout`` seconds, or is
+    told to stop by ``close``, removes its lane and exits; ``close`` waits
+    a bounded time for queued jobs before cancelling them.  Each
+    session holds at most ``max_depth`` pending or running jobs; further
+    jobs are refused so an overloaded thread is reported to the user
+    instead of growing without bound.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        idle_timeout: float = IDLE_TIMEOUT_SECONDS,
+        max_depth: int = MAX_QUEUE_DEPTH,
+    ) -> None:
         """
         Initialize an empty queue manager.
+
+        Args:
+            idle_timeout (float): Seconds a consumer waits for new jobs
+                before retiring its lane.
+            max_depth (int): Maximum pending or running jobs per session.
         """
 
-        self._queues: dict[
-            tuple[str, str],
-            asyncio.Queue[Callable[[], Awaitable[None]]],
-        ] = {}
-        self._consumers: dict[tuple[str, str], asyncio.Task[None]] = {}
+        self._idle_timeout: float = idle_timeout
+        self._max_depth: int = max_depth
+        self._closing: bool = False
+        self._lanes: dict[str, _Lane] = {}
 
     async def enqueue(
         self,
         channel: str,
         thread_ts: str,
-        job: Callable[[], Awaitable[None]],
-    ) -> None:
+        job: Coroutine[Any, Any, None],
+    ) -> bool:
         """
         Enqueue an async job for serial execution within a session.
 
-        If no consumer task exists for the given session key, one is
-        spawned automatically.
+        The first job for a session spawns its lane and consumer; later jobs wake
+        the existing one.  A job refused because the session is full is
+        closed without running.
 
         Args:
             channel (str): The Slack channel ID.
             thread_ts (str): The Slack thread timestamp.
-            job (Callable[[], Awaitable[None]]): A zero-argument async
-                callable to execute.
+            job (Coroutine[Any, Any, None]): The coroutine to await; it
+                is not started until its turn comes.
+
+        Returns:
+            bool: True if the job was queued, False if the session was full.
         """
 
-        key: tuple[str, str] = (channel, thread_ts)
+        key: str = _session_key(channel, thread_ts)
+        lane: _Lane | None = self._lanes.get(key)
 
-        if key not in self._queues:
-            self._queues[key] = asyncio.Queue()
+        if lane is None:
+            lane = self._lanes[key] = _Lane()
+            lane.jobs.append(job)
+            lane.consumer = asyncio.create_task(self._consume(key, lane))
 
-        await self._queues[key].put(job)
+            return True
 
-        if key not in self._consumers or self._consumers[key].done():
-            self._consumers[key] = asyncio.create_task(self._consume(key))
+        if len(lane.jobs) + lane.running >= self._max_depth:
+            job.close()
 
-    async def _consume(self, key: tuple[str, str]) -> None:
+            return False
+
+        lane.jobs.append(job)
+        lane.wakeup.set()
+
+        return True
+
+    async def close(self, timeout: float = SHUTDOWN_TIMEOUT_SECONDS) -> None:
         """
-        Consume jobs from the queue for a specific session key.
+        Stop every consumer, giving pending jobs up to ``timeout`` to run.
 
-        Runs until the queue is empty, then cleans up.
+        Consumers still busy when the timeout expires are cancelled, which
+        cancels their running job and closes the jobs still queued.
 
         Args:
-            key (tuple[str, str]): The (channel, thread_ts) session key.
+            timeout (float): Seconds to wait for the consumers to drain.
         """
 
-        queue: asyncio.Queue[Callable[[], Awaitable[None]]] = self._queues[key]
+        self._closing = True
+        consumers: list[asyncio.Task[None]] = []
+
+        for lane in self._lanes.values():
+            lane.wakeup.set()
 
-        while not queue.empty():
-            job: Callable[[], Awaitable[None]] = await queue.get()
+            if lane.consumer is not None:
+                consumers.append(lane.consumer)
 
-            try:
-                await job()
-            except Exception:
-                logger.exception(
-                    "Job failed for session %s",
-                    key,
-                )
-            finally:
-                queue.task_done()
+        if not consumers:
+            return
+
+        try:
+            async with asyncio.timeout(timeout):
+                await asyncio.gather(*consumers)
+        except TimeoutError:
+            logger.warning(
+                "Cancelling %d session queues still busy after %g seconds",
+                sum(not consumer.done() for consumer in consumers),
+                timeout,
+            )
+
+            for consumer in consumers:
+                consumer.cancel()
+
+            await asyncio.gather(*consumers, return_exceptions=True)
+
+    async def _consume(self, key: str, lane: _Lane) -> None:
+        """
+        Consume jobs for a specific session key.
+
+        Drains every buffered job back to back, with no per-job future or
+        event-loop round trip, and parks only between bursts.  Exits after
+        ``idle_timeout`` seconds without a job or once ``close`` is called,
+        removing the lane before returning so the next ``enqueue``
+        starts a fresh consumer.
+
+        Args:
+            key (str): The session key built by ``_session_key``.
+            lane (_Lane): The lane owning the jobs.
+        """
 
-        del self._queues[key]
-        del self._consumers[key]
+        # Bound once so the drain loop uses local loads, not attribute lookups.
+        jobs: deque[Coroutine[Any, Any, None]] = lane.jobs
+        next_job: Callable[[], Coroutine[Any, Any, None]] = jobs.popleft
+        log_exception: Callable[..., None] = logger.exception
+        wakeup: asyncio.Event = lane.wakeup
+
+        try:
+            while True:
+                while jobs:
+                    job: Coroutine[Any, Any, None] = next_job()
+                    lane.running = True
+
+                    try:
+                        await job
+                    except Exception:
+                        log_exception(
+                            "Job failed for session %r",
+                            key,
+                        )
+                    finally:
+                        lane.running = False
+
+                if self._closing:
+                    return
+
+                wakeup.clear()
+
+                # asyncio.timeout waits in place, where wait_for would wrap
+                # every park in a fresh task.
+                try:
+                    async with asyncio.timeout(self._idle_timeout):
+                        await wakeup.wait()
+                except TimeoutError:
+                    # A job may have landed after the timeout fired but
+                    # before this task resumed.
+                    if not jobs:
+                        return
+        finally:
+            # Only reached with jobs left if the consumer was cancelled.
+            for job in jobs:
+                job.close()
+
+            lane.consumer = None
+            del self._lanes[key]
@@ -1,10 +1,24 @@
 # type: ignore
+import asyncio
+import inspect
 from unittest.mock import AsyncMock, patch
 
 import pytest
 from slack_bolt.async_app import AsyncApp
-
-from claude_slack_bot.bot import _format_response, register_handlers
+from slack_bolt.context.async_context import AsyncBoltContext
+from slack_bolt.listener_matcher.async_listener_matcher import (
+    AsyncCustomListenerMatcher,
+)
+
+from claude_slack_bot.bot import (
+    SLACK_MAX_MESSAGE_BYTES,
+    _extract_mention_prompt,
+    _fit_slack_limit,
+    _format_response,
+    _is_user_direct_message,
+    _run_claude,
+    register_handlers,
+)
 from claude_slack_bot.claude_runner import ClaudeResult
 from claude_slack_bot.config import Config
 from claude_slack_bot.session import SessionQueue, SessionStore
@@ -63,7 +77,21 @@ def dm_event():
     }
 
 
-async def _invoke_handler(app, event, say, handler_name=None):
+def _discard_job(channel, thread_ts, job):
+    job.close()
+
+    return True
+
+
+def _reject_job(channel, thread_ts, job):
+    job.close()
+
+    return False
+
+
+async def _invoke_handler(app, event, say, handler_name=None, ack=None):
+    ack = ack or AsyncMock()
+
     for registered_listener in app._async_listeners:
         if not hasattr(registered_listener, "ack_function"):
             continue
@@ -74,13 +102,35 @@ async def _invoke_handler(app, event, say, handler_name=None):
             if func_name != handler_name:
                 continue
 
-        await registered_listener.ack_function(event=event, say=say)
+        custom_matchers = [
+            matcher
+            for matcher in registered_listener.matchers
+            if isinstance(matcher, AsyncCustomListenerMatcher)
+        ]
+
+        if not all([await matcher.func(event=event) for matcher in custom_matchers]):
+            continue
+
+        kwargs = {
+            "event": event,
+            "say": say,
+            "ack": ack,
+            "context": AsyncBoltContext({"bot_user_id": "BOT123"}),
+        }
+        accepted = inspect.signature(registered_listener.ack_function).parameters
+
+        await registered_listener.ack_function(
+            **{name: value for name, value in kwargs.items() if name in accepted}
+        )
 
 
 class TestHandleMention:
-    @pytest.mark.asyncio
     @patch("claude_slack_bot.bot._react", new_callable=AsyncMock)
-    @patch("claude_slack_bot.bot.SessionQueue.enqueue", new_callable=AsyncMock)
+    @patch(
+        "claude_slack_bot.bot.SessionQueue.enqueue",
+        new_callable=AsyncMock,
+        side_effect=_discard_job,
+    )
     async def test_handle_mention_authorized_user_enqueues_job(
         self,
         mock_enqueue,
@@ -96,7 +146,84 @@ class TestHandleMention:
         mock_react.assert_called_once_with(app, "C001", "1234567890.123456", "eyes")
         mock_enqueue.assert_called_once()
 
-    @pytest.mark.asyncio
+    @patch("claude_slack_bot.bot._react", new_callable=AsyncMock)
+    @patch(
+        "claude_slack_bot.bot.SessionQueue.enqueue",
+        new_callable=AsyncMock,
+        side_effect=_discard_job,
+    )
+    async def test_handle_mention_explicit_ack_precedes_reaction(
+        self,
+        mock_enqueue,
+        mock_react,
+        app,
+        mention_event,
+    ):
+        say = AsyncMock()
+        ack = AsyncMock()
+        ack.side_effect = lambda: mock_react.assert_not_called()
+
+        await _invoke_handler(
+            app,
+            mention_event,
+            say,
+            handler_name="handle_mention",
+            ack=ack,
+        )
+
+        ack.assert_awaited_once()
+        mock_react.assert_called_once()
+
+    @patch("claude_slack_bot.bot._react", new_callable=AsyncMock)
+    @patch(
+        "claude_slack_bot.bot.SessionQueue.enqueue",
+        new_callable=AsyncMock,
+        side_effect=_discard_job,
+    )
+    async def test_handle_mention_does_not_wait_for_reaction(
+        self,
+        mock_enqueue,
+        mock_react,
+        app,
+        mention_event,
+    ):
+        say = AsyncMock()
+        reaction_started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_react(*args):
+            reaction_started.set()
+            await release.wait()
+
+        mock_react.side_effect = slow_react
+
+        await asyncio.wait_for(_invoke_handler(app, mention_event, say), timeout=0.5)
+
+        mock_enqueue.assert_called_once()
+        await asyncio.wait_for(reaction_started.wait(), timeout=0.5)
+        release.set()
+
+    @patch("claude_slack_bot.bot._react", new_callable=AsyncMock)
+    @patch(
+        "claude_slack_bot.bot.SessionQueue.enqueue",
+        new_callable=AsyncMock,
+        side_effect=_discard_job,
+    )
+    async def test_handle_mention_ignores_redelivered_event(
+        self,
+        mock_enqueue,
+        mock_react,
+        app,
+        mention_event,
+    ):
+        say = AsyncMock()
+
+        await _invoke_handler(app, mention_event, say)
+        await _invoke_handler(app, dict(mention_event), say)
+
+        mock_react.assert_called_once()
+        mock_enqueue.assert_called_once()
+
     async def test_handle_mention_unauthorized_user_rejected(self, app):
         say = AsyncMock()
         event = {
@@ -113,7 +240,44 @@ class TestHandleMention:
             thread_ts="1234567890.123456",
         )
 
-    @pytest.mark.asyncio
+    @patch("claude_slack_bot.bot._react", new_callable=AsyncMock)
+    async def test_handle_mention_without_user_ignored(self, mock_react, app):
+        say = AsyncMock()
+        event = {
+            "channel": "C001",
+            "text": "<@BOT123> hello",
+            "ts": "1234567890.123456",
+        }
+
+        await _invoke_handler(app, event, say)
+
+        say.assert_not_called()
+        mock_react.assert_not_called()
+
+    @patch("claude_slack_bot.bot._react", new_callable=AsyncMock)
+    @patch(
+        "claude_slack_bot.bot.SessionQueue.enqueue",
+        new_callable=AsyncMock,
+        side_effect=_reject_job,
+    )
+    async def test_handle_mention_rejected_when_queue_full(
+        self,
+        mock_enqueue,
+        mock_react,
+        app,
+        mention_event,
+    ):
+        say = AsyncMock()
+
+        await _invoke_handler(app, mention_event, say)
+
+        say.assert_called_once_with(
+            "I'm still working on previous requests — try again shortly.",
+            thread_ts="1234567890.123456",
+        )
+        mock_enqueue.assert_called_once()
+        mock_react.assert_not_called()
+
     async def test_handle_mention_empty_prompt_rejected(self, app):
         say = AsyncMock()
         event = {
@@ -130,9 +294,12 @@ class TestHandleMention:
             thread_ts="1234567890.123456",
         )
 
-    @pytest.mark.asyncio
     @patch("claude_slack_bot.bot._react", new_callable=AsyncMock)
-    @patch("claude_slack_bot.bot.SessionQueue.enqueue", new_callable=AsyncMock)
+    @patch(
+        "claude_slack_bot.bot.SessionQueue.enqueue",
+        new_callable=AsyncMock,
+        side_effect=_discard_job,
+    )
     async def test_handle_mention_in_thread_reacts_with_eyes(
         self,
         mock_enqueue,
@@ -158,9 +325,12 @@ DM_HANDLER: str = "handle_direct_message"
 
 
 class TestHandleDirectMessage:
-    @pytest.mark.asyncio
     @patch("claude_slack_bot.bot._react", new_callable=AsyncMock)
-    @patch("claude_slack_bot.bot.SessionQueue.enqueue", new_callable=AsyncMock)
+    @patch(
+        "claude_slack_bot.bot.SessionQueue.enqueue",
+        new_callable=AsyncMock,
+        side_effect=_discard_job,
+    )
     async def test_dm_enqueues_job(
         self,
         mock_enqueue,
@@ -176,7 +346,6 @@ class TestHandleDirectMessage:
         mock_react.assert_called_once_with(app, "D001", "1234567890.123456", "eyes")
         mock_enqueue.assert_called_once()
 
-    @pytest.mark.asyncio
     async def test_dm_unauthorized_user_rejected(self, app):
         say = AsyncMock()
         event = {
@@ -194,7 +363,6 @@ class TestHandleDirectMessage:
             thread_ts="1234567890.123456",
         )
 
-    @pytest.mark.asyncio
     async def test_dm_empty_prompt_rejected(self, app):
         say = AsyncMock()
         event = {
@@ -212,9 +380,7 @@ class TestHandleDirectMessage:
             thread_ts="1234567890.123456",
         )
 
-    @pytest.mark.asyncio
-    async def test_dm_ignores_non_im_channel_type(self, app):
-        say = AsyncMock()
+    async def test_dm_matcher_rejects_non_im_channel_type(self):
         event = {
             "user": "U001",
             "channel": "C001",
@@ -223,13 +389,9 @@ class TestHandleDirectMessage:
             "ts": "1234567890.123456",
         }
 
-        await _invoke_handler(app, event, say, handler_name=DM_HANDLER)
+        assert await _is_user_direct_message(event) is False
 
-        say.assert_not_called()
-
-    @pytest.mark.asyncio
-    async def test_dm_ignores_subtyped_messages(self, app):
-        say = AsyncMock()
+    async def test_dm_matcher_rejects_subtyped_messages(self):
         event = {
             "user": "U001",
             "channel": "D001",
@@ -239,13 +401,17 @@ class TestHandleDirectMessage:
             "ts": "1234567890.123456",
         }
 
-        await _invoke_handler(app, event, say, handler_name=DM_HANDLER)
+        assert await _is_user_direct_message(event) is False
 
-        say.assert_not_called()
+    async def test_dm_matcher_accepts_plain_dm(self, dm_event):
+        assert await _is_user_direct_message(dm_event) is True
 
-    @pytest.mark.asyncio
     @patch("claude_slack_bot.bot._react", new_callable=AsyncMock)
-    @patch("claude_slack_bot.bot.SessionQueue.enqueue", new_callable=AsyncMock)
+    @patch(
+        "claude_slack_bot.bot.SessionQueue.enqueue",
+        new_callable=AsyncMock,
+        side_effect=_discard_job,
+    )
     async def test_dm_in_thread_reacts_with_eyes(
         self,
         mock_enqueue,
@@ -268,8 +434,152 @@ class TestHandleDirectMessage:
         mock_react.assert_called_once_with(app, "D001", "1234567890.999999", "eyes")
 
 
+def _fake_run_claude(*chunks, delay=0.01):
+    async def fake(**kwargs):
+        for chunk in chunks:
+            await kwargs["on_text"](chunk)
+            await asyncio.sleep(delay)
+
+        return ClaudeResult(
+            output="Final answer",
+            is_error=False,
+            num_turns=1,
+            duration_ms=100,
+            session_id="sess-abc",
+        )
+
+    return fake
+
+
+class TestRunClaude:
+    async def test_posts_result_when_nothing_streamed(
+        self,
+        app,
+        config,
+        session_store,
+    ):
+        app.client.chat_postMessage = AsyncMock(return_value={"ts": "111.222"})
+        app.client.chat_update = AsyncMock()
+
+        with patch("claude_slack_bot.bot.run_claude", _fake_run_claude()):
+            await _run_claude(app, config, session_store, "hi", "C001", "123.456")
+
+        app.client.chat_postMessage.assert_awaited_once_with(
+            channel="C001",
+            text="Final answer",
+            thread_ts="123.456",
+        )
+        app.client.chat_update.assert_not_called()
+        assert session_store.get("C001", "123.456") == "sess-abc"
+
+    async def test_streamed_text_replaced_by_result(
+        self,
+        app,
+        config,
+        session_store,
+    ):
+        app.client.chat_postMessage = AsyncMock(return_value={"ts": "111.222"})
+        app.client.chat_update = AsyncMock()
+
+        with patch(
+            "claude_slack_bot.bot.run_claude",
+            _fake_run_claude("Working on it", "Still working"),
+        ):
+            await _run_claude(app, config, session_store, "hi", "C001", "123.456")
+
+        app.client.chat_postMessage.assert_awaited_once_with(
+            channel="C001",
+            text="Working on it",
+            thread_ts="123.456",
+        )
+        app.client.chat_update.assert_awaited_once_with(
+            channel="C001",
+            ts="111.222",
+            text="Final answer",
+        )
+
+    @patch("claude_slack_bot.bot.STREAM_FLUSH_INTERVAL_SECONDS", 0.05)
+    async def test_streamed_text_coalesced_between_flushes(
+        self,
+        app,
+        config,
+        session_store,
+    ):
+        app.client.chat_postMessage = AsyncMock(return_value={"ts": "111.222"})
+        app.client.chat_update = AsyncMock()
+
+        with patch(
+            "claude_slack_bot.bot.run_claude",
+            _fake_run_claude("first", "second", "third", delay=0.02),
+        ):
+            await _run_claude(app, config, session_store, "hi", "C001", "123.456")
+
+        updates = [c.kwargs["text"] for c in app.client.chat_update.await_args_list]
+        assert app.client.chat_postMessage.await_args.kwargs["text"] == "first"
+        assert "second" not in updates
+        assert updates[-1] == "Final answer"
+
+    async def test_run_exceeding_timeout_reports_timeout(self, app, session_store):
+        config = Config(
+            slack_bot_token="xoxb-test",
+            slack_app_token="xapp-test",
+            allowed_user_ids=frozenset({"U001"}),
+            project_path="/tmp/project",
+            claude_timeout_seconds=0.01,
+        )
+        app.client.chat_postMessage = AsyncMock(return_value={"ts": "111.222"})
+
+        async def slow_run_claude(**kwargs):
+            await asyncio.sleep(10)
+
+        with patch("claude_slack_bot.bot.run_claude", slow_run_claude):
+            await _run_claude(app, config, session_store, "hi", "C001", "123.456")
+
+        app.client.chat_postMessage.assert_awaited_once_with(
+            channel="C001",
+            text="⏱️ Claude timed out after 0.01 seconds.",
+            thread_ts="123.456",
+        )
+
+
+class TestExtractMentionPrompt:
+    def test_strips_leading_bot_mention(self):
+        prompt = _extract_mention_prompt("<@BOT123>  fix the bug ", "<@BOT123>")
+
+        assert prompt == "fix the bug"
+
+    def test_falls_back_when_mention_not_leading(self):
+        prompt = _extract_mention_prompt("hey <@BOT123> fix the bug", "<@BOT123>")
+
+        assert prompt == "fix the bug"
+
+    def test_falls_back_when_bot_mention_unknown(self):
+        prompt = _extract_mention_prompt("<@BOT123> fix the bug", "")
+
+        assert prompt == "fix the bug"
+
+
+class TestFitSlackLimit:
+    def test_short_text_unchanged(self):
+        assert _fit_slack_limit("hello") == "hello"
+
+    def test_multibyte_text_truncated_by_bytes(self):
+        text = "é" * SLACK_MAX_MESSAGE_BYTES
+
+        fitted = _fit_slack_limit(text)
+
+        assert len(fitted.encode("utf-8")) <= SLACK_MAX_MESSAGE_BYTES
+        assert fitted.endswith("… (truncated)")
+        assert set(fitted.removesuffix("\n… (truncated)")) == {"é"}
+
+    def test_text_at_limit_unchanged(self):
+        text = "x" * SLACK_MAX_MESSAGE_BYTES
+
+        assert _fit_slack_limit(text) == text
+
+
 class TestFormatResponse:
-    def test_format_response_returns_plain_output(self):
+    async def test_format_response_returns_plain_output(self):
         result = ClaudeResult(
             output="All done!",
             is_error=False,
@@ -278,14 +588,14 @@ class TestFormatResponse:
             session_id="sess-abc",
         )
 
-        message = _format_response(result, max_length=2900)
+        message = await _format_response(result, max_length=2900)
 
         assert "All done!" in message
         assert "Finished" not in message
         assert "Turns" not in message
         assert "Duration" not in message
 
-    def test_format_response_converts_markdown_bold(self):
+    async def test_format_response_converts_markdown_bold(self):
         result = ClaudeResult(
             output="This is **bold** text",
             is_error=False,
@@ -294,12 +604,12 @@ class TestFormatResponse:
             session_id="sess-abc",
         )
 
-        message = _format_response(result, max_length=2900)
+        message = await _format_response(result, max_length=2900)
 
         assert "**bold**" not in message
         assert "*bold*" in message
 
-    def test_format_response_converts_markdown_links(self):
+    async def test_format_response_converts_markdown_links(self):
         result = ClaudeResult(
             output="See [docs](https://example.com)",
             is_error=False,
@@ -308,12 +618,12 @@ class TestFormatResponse:
             session_id="sess-abc",
         )
 
-        message = _format_response(result, max_length=2900)
+        message = await _format_response(result, max_length=2900)
 
         assert "[docs](https://example.com)" not in message
         assert "<https://example.com|docs>" in message
 
-    def test_format_response_error(self):
+    async def test_format_response_error(self):
         result = ClaudeResult(
             output="Something broke",
             is_error=True,
@@ -322,12 +632,12 @@ class TestFormatResponse:
             session_id="sess-abc",
         )
 
-        message = _format_response(result, max_length=2900)
+        message = await _format_response(result, max_length=2900)
 
         assert "⚠️" in message
         assert "Something broke" in message
 
-    def test_format_response_truncates_long_output(self):
+    async def test_format_response_truncates_long_output(self):
         result = ClaudeResult(
             output="x" * 5000,
             is_error=False,
@@ -336,6 +646,24 @@ class TestFormatResponse:
             session_id="sess-abc",
         )
 
-        message = _format_response(result, max_length=100)
+        message = await _format_response(result, max_length=100)
 
         assert "… (truncated)" in message
+
+    @patch("claude_slack_bot.bot._convert_markdown")
+    async def test_format_response_skips_conversion_for_plain_text(
+        self,
+        mock_convert,
+    ):
+        result = ClaudeResult(
+            output="  All done, nothing to report.  ",
+            is_error=False,
+            num_turns=1,
+            duration_ms=100,
+            session_id="sess-abc",
+        )
+
+        message = await _format_response(result, max_length=2900)
+
+        assert message == "All done, nothing to report."
+        mock_convert.assert_not_called()
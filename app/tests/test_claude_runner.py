@@ -1,25 +1,44 @@
 # type: ignore
-from unittest.mock import MagicMock, patch
+import json
+from dataclasses import dataclass
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from claude_agent_sdk import ClaudeAgentOptions, SystemMessage
+from claude_agent_sdk import (
+    AssistantMessage,
+    ClaudeAgentOptions,
+    SystemMessage,
+    TextBlock,
+)
 from claude_agent_sdk._errors import MessageParseError
+from claude_agent_sdk._internal.transport import subprocess_cli as sdk_transport
 
 from claude_slack_bot.claude_runner import (
+    _KNOWN_MESSAGE_TYPES,
     _original_parse_message,
     _patched_parse_message,
     run_claude,
 )
 
 
-async def _async_gen(*items):
-    for item in items:
-        yield item
+class _AsyncList:
+    def __init__(self, items):
+        self._it = iter(items)
 
+    def __aiter__(self):
+        return self
 
-class TestPatchedParseMessage:
-    def test_delegates_to_original_for_known_types(self):
-        data = {
+    async def __anext__(self):
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+_PARSE_CASES = [
+    (
+        "result_message",
+        {
             "type": "result",
             "subtype": "success",
             "result": "hello",
@@ -28,27 +47,57 @@ class TestPatchedParseMessage:
             "duration_ms": 100,
             "duration_api_ms": 50,
             "session_id": "abc",
-        }
+        },
+        "ResultMessage",
+        None,
+    ),
+    (
+        "rate_limit",
+        {"type": "rate_limit_event", "retry_after_ms": 5000},
+        "SystemMessage",
+        "rate_limit_event",
+    ),
+    ("missing_type", {"foo": "bar"}, "SystemMessage", "unknown"),
+]
+
 
+class TestPatchedParseMessage:
+    @pytest.mark.parametrize(
+        ("name", "data", "expected_type", "expected_subtype"),
+        _PARSE_CASES,
+        ids=[case[0] for case in _PARSE_CASES],
+    )
+    def test_parses_message(self, name, data, expected_type, expected_subtype):
         message = _patched_parse_message(data)
 
-        assert type(message).__name__ == "ResultMessage"
+        assert type(message).__name__ == expected_type
 
-    def test_returns_system_message_for_unknown_types(self):
-        data = {"type": "rate_limit_event", "retry_after_ms": 5000}
+        if expected_subtype is not None:
+            assert message.subtype == expected_subtype
+            assert message.data == data
 
-        message = _patched_parse_message(data)
+    def test_known_types_read_from_sdk_parser(self):
+        assert {"assistant", "user", "result", "system"} <= _KNOWN_MESSAGE_TYPES
 
-        assert isinstance(message, SystemMessage)
+    def test_unknown_types_skip_original_parser(self):
+        data = {"type": "rate_limit_event"}
+
+        with patch(
+            "claude_slack_bot.claude_runner._original_parse_message"
+        ) as mock_original:
+            message = _patched_parse_message(data)
+
+        mock_original.assert_not_called()
         assert message.subtype == "rate_limit_event"
-        assert message.data == data
 
-    def test_handles_missing_type_field(self):
-        data = {"foo": "bar"}
+    def test_falls_back_to_exception_path_without_known_types(self):
+        data = {"type": "rate_limit_event"}
 
-        message = _patched_parse_message(data)
+        with patch("claude_slack_bot.claude_runner._KNOWN_MESSAGE_TYPES", None):
+            message = _patched_parse_message(data)
 
         assert isinstance(message, SystemMessage)
+        assert message.subtype == "rate_limit_event"
 
     def test_original_still_raises_for_unknown_types(self):
         data = {"type": "rate_limit_event"}
@@ -57,289 +106,211 @@ class TestPatchedParseMessage:
             _original_parse_message(data)
 
 
-class TestRunClaude:
-    @pytest.mark.asyncio
-    async def test_success_returns_result(self):
-        result_msg = MagicMock()
-        result_msg.result = "All done!"
-        result_msg.is_error = False
-        result_msg.num_turns = 3
-        result_msg.duration_ms = 5000
-        result_msg.session_id = "sess-123"
-
-        with (
-            patch(
-                "claude_slack_bot.claude_runner.query",
-                return_value=_async_gen(result_msg),
-            ),
-            patch(
-                "claude_slack_bot.claude_runner.ResultMessage",
-                new=type(result_msg),
-            ),
-        ):
-            result = await run_claude("hello", "/tmp/project")
+class TestFastJson:
+    @pytest.fixture(autouse=True)
+    def _require_orjson(self):
+        pytest.importorskip("orjson")
 
-        assert result.output == "All done!"
-        assert result.is_error is False
-        assert result.num_turns == 3
-        assert result.duration_ms == 5000
-        assert result.session_id == "sess-123"
-
-    @pytest.mark.asyncio
-    async def test_error_result(self):
-        result_msg = MagicMock()
-        result_msg.result = "Something broke"
-        result_msg.is_error = True
-        result_msg.num_turns = 1
-        result_msg.duration_ms = 200
-        result_msg.session_id = "sess-456"
-
-        with (
-            patch(
-                "claude_slack_bot.claude_runner.query",
-                return_value=_async_gen(result_msg),
-            ),
-            patch(
-                "claude_slack_bot.claude_runner.ResultMessage",
-                new=type(result_msg),
-            ),
-        ):
-            result = await run_claude("hello", "/tmp/project")
+    def test_transport_json_patched(self):
+        assert sdk_transport.json is not json
+        assert sdk_transport.json.loads('{"type": "result"}') == {"type": "result"}
 
-        assert result.is_error is True
-        assert result.output == "Something broke"
+    def test_complete_line_with_lone_surrogate_falls_back_to_stdlib(self):
+        line = '{"type": "assistant", "text": "abc\\ud83d"}'
 
-    @pytest.mark.asyncio
-    async def test_no_result_message_returns_fallback(self):
-        assistant_msg = MagicMock()
+        assert sdk_transport.json.loads(line) == json.loads(line)
 
-        with patch(
-            "claude_slack_bot.claude_runner.query",
-            return_value=_async_gen(assistant_msg),
-        ):
-            result = await run_claude("hello", "/tmp/project")
+    def test_partial_line_not_retried_with_stdlib(self):
+        with patch.object(json, "loads", wraps=json.loads) as mock_stdlib_loads:
+            with pytest.raises(json.JSONDecodeError):
+                sdk_transport.json.loads('{"type": "res')
 
-        assert result.is_error is True
-        assert result.output == "No result received from Claude."
+        mock_stdlib_loads.assert_not_called()
 
-    @pytest.mark.asyncio
-    async def test_empty_result_defaults_to_done(self):
-        result_msg = MagicMock()
-        result_msg.result = ""
-        result_msg.is_error = False
-        result_msg.num_turns = 1
-        result_msg.duration_ms = 100
-        result_msg.session_id = ""
-
-        with (
-            patch(
-                "claude_slack_bot.claude_runner.query",
-                return_value=_async_gen(result_msg),
-            ),
-            patch(
-                "claude_slack_bot.claude_runner.ResultMessage",
-                new=type(result_msg),
-            ),
-        ):
-            result = await run_claude("hello", "/tmp/project")
-
-        assert result.output == "Done, no output."
-
-    @pytest.mark.asyncio
-    async def test_model_and_max_turns_passed_to_options(self):
-        result_msg = MagicMock()
-        result_msg.result = "ok"
-        result_msg.is_error = False
-        result_msg.num_turns = 1
-        result_msg.duration_ms = 100
-        result_msg.session_id = ""
-
-        with (
-            patch(
-                "claude_slack_bot.claude_runner.query",
-                return_value=_async_gen(result_msg),
+    def test_partial_json_raises_stdlib_decode_error(self):
+        with pytest.raises(json.JSONDecodeError):
+            sdk_transport.json.loads('{"type": "res')
+
+    def test_other_attributes_keep_stdlib_behaviour(self):
+        assert sdk_transport.json.dumps({"a": 1}) == json.dumps({"a": 1})
+
+
+@dataclass(frozen=True)
+class _FakeResult:
+    result: str = "ok"
+    is_error: bool = False
+    num_turns: int = 1
+    duration_ms: int = 100
+    session_id: str = ""
+
+
+_STATUS_MSG = SystemMessage(subtype="status", data={})
+_RATE_LIMIT_MSG = SystemMessage(subtype="rate_limit_event", data={})
+_INIT_MSG = SystemMessage(subtype="init", data={"session_id": "sess-from-init"})
+
+
+class _MockedRunner:
+    def __init__(self, query):
+        self.query = query
+
+    async def run(self, *messages, **kwargs):
+        self.query.return_value = _AsyncList(messages)
+
+        return await run_claude("hello", "/tmp/project", **kwargs)
+
+
+_WRAPPED_OPTIONS = MagicMock(wraps=ClaudeAgentOptions)
+
+
+@pytest.fixture
+def options_spy(monkeypatch):
+    _WRAPPED_OPTIONS.reset_mock()
+    monkeypatch.setattr(
+        "claude_slack_bot.claude_runner.ClaudeAgentOptions",
+        _WRAPPED_OPTIONS,
+    )
+
+    return _WRAPPED_OPTIONS
+
+
+@pytest.fixture
+def mocked_runner(options_spy):
+    with (
+        patch("claude_slack_bot.claude_runner.query") as mock_query,
+        patch("claude_slack_bot.claude_runner.ResultMessage", new=_FakeResult),
+    ):
+        yield _MockedRunner(mock_query)
+
+
+class TestRunClaude:
+    @pytest.mark.parametrize(
+        (
+            "result_value",
+            "is_error",
+            "num_turns",
+            "duration_ms",
+            "session_id",
+            "expected_output",
+            "model",
+            "max_turns",
+            "expected_model",
+            "expected_max_turns",
+        ),
+        [
+            ("All done!", False, 3, 5000, "sess-123", "All done!", "", 0, None, None),
+            ("Something broke", True, 1, 200, "", "Something broke", "", 0, None, None),
+            ("", False, 1, 100, "", "Done, no output.", "", 0, None, None),
+            (
+                "ok",
+                False,
+                1,
+                100,
+                "",
+                "ok",
+                "claude-sonnet-4-6",
+                10,
+                "claude-sonnet-4-6",
+                10,
             ),
-            patch(
-                "claude_slack_bot.claude_runner.ResultMessage",
-                new=type(result_msg),
+        ],
+        ids=["success", "error", "empty", "with_model"],
+    )
+    async def test_result_and_options(
+        self,
+        mocked_runner,
+        options_spy,
+        result_value,
+        is_error,
+        num_turns,
+        duration_ms,
+        session_id,
+        expected_output,
+        model,
+        max_turns,
+        expected_model,
+        expected_max_turns,
+    ):
+        result = await mocked_runner.run(
+            _FakeResult(
+                result=result_value,
+                is_error=is_error,
+                num_turns=num_turns,
+                duration_ms=duration_ms,
+                session_id=session_id,
             ),
-            patch(
-                "claude_slack_bot.claude_runner.ClaudeAgentOptions",
-                wraps=ClaudeAgentOptions,
-            ) as mock_options_cls,
-        ):
-            await run_claude(
-                "hello",
-                "/tmp/project",
-                model="claude-sonnet-4-6",
-                max_turns=10,
-            )
-
-        call_kwargs = mock_options_cls.call_args[1]
-        assert call_kwargs["model"] == "claude-sonnet-4-6"
-        assert call_kwargs["max_turns"] == 10
+            model=model,
+            max_turns=max_turns,
+        )
+
+        assert result.output == expected_output
+        assert result.is_error is is_error
+        assert result.num_turns == num_turns
+        assert result.duration_ms == duration_ms
+        assert result.session_id == session_id
+
+        call_kwargs = options_spy.call_args[1]
+        assert call_kwargs["model"] == expected_model
+        assert call_kwargs["max_turns"] == expected_max_turns
         assert call_kwargs["cwd"] == "/tmp/project"
 
-    @pytest.mark.asyncio
-    async def test_no_model_omits_key(self):
-        result_msg = MagicMock()
-        result_msg.result = "ok"
-        result_msg.is_error = False
-        result_msg.num_turns = 1
-        result_msg.duration_ms = 100
-        result_msg.session_id = ""
-
-        with (
-            patch(
-                "claude_slack_bot.claude_runner.query",
-                return_value=_async_gen(result_msg),
-            ),
-            patch(
-                "claude_slack_bot.claude_runner.ResultMessage",
-                new=type(result_msg),
-            ),
-            patch(
-                "claude_slack_bot.claude_runner.ClaudeAgentOptions",
-                wraps=ClaudeAgentOptions,
-            ) as mock_options_cls,
-        ):
-            await run_claude("hello", "/tmp/project", model="", max_turns=0)
-
-        call_kwargs = mock_options_cls.call_args[1]
-        assert call_kwargs["model"] is None
-        assert call_kwargs["max_turns"] is None
-
-    @pytest.mark.asyncio
-    async def test_skips_unknown_message_types(self):
-        unknown_msg = SystemMessage(subtype="rate_limit_event", data={})
-        result_msg = MagicMock()
-        result_msg.result = "Success after rate limit"
-        result_msg.is_error = False
-        result_msg.num_turns = 2
-        result_msg.duration_ms = 3000
-        result_msg.session_id = "sess-789"
-
-        with (
-            patch(
-                "claude_slack_bot.claude_runner.query",
-                return_value=_async_gen(unknown_msg, result_msg),
-            ),
-            patch(
-                "claude_slack_bot.claude_runner.ResultMessage",
-                new=type(result_msg),
-            ),
-        ):
-            result = await run_claude("hello", "/tmp/project")
+    async def test_no_result_message_returns_fallback(self, mocked_runner):
+        result = await mocked_runner.run(_STATUS_MSG)
+
+        assert result.is_error is True
+        assert result.output == "No result received from Claude."
+
+    async def test_skips_unknown_message_types(self, mocked_runner):
+        result = await mocked_runner.run(
+            _RATE_LIMIT_MSG,
+            _FakeResult(result="Success after rate limit", num_turns=2),
+        )
 
         assert result.output == "Success after rate limit"
         assert result.is_error is False
 
-    @pytest.mark.asyncio
-    async def test_session_id_captured_from_init_message(self):
-        init_msg = SystemMessage(
-            subtype="init",
-            data={"session_id": "sess-from-init"},
+    async def test_session_id_captured_from_init_message(self, mocked_runner):
+        result = await mocked_runner.run(
+            _INIT_MSG,
+            _FakeResult(),
         )
-        result_msg = MagicMock()
-        result_msg.result = "ok"
-        result_msg.is_error = False
-        result_msg.num_turns = 1
-        result_msg.duration_ms = 100
-        result_msg.session_id = ""
-
-        with (
-            patch(
-                "claude_slack_bot.claude_runner.query",
-                return_value=_async_gen(init_msg, result_msg),
-            ),
-            patch(
-                "claude_slack_bot.claude_runner.ResultMessage",
-                new=type(result_msg),
-            ),
-        ):
-            result = await run_claude("hello", "/tmp/project")
 
         assert result.session_id == "sess-from-init"
 
-    @pytest.mark.asyncio
-    async def test_session_id_from_result_takes_precedence(self):
-        init_msg = SystemMessage(
-            subtype="init",
-            data={"session_id": "sess-from-init"},
+    async def test_session_id_from_result_takes_precedence(self, mocked_runner):
+        result = await mocked_runner.run(
+            _INIT_MSG,
+            _FakeResult(session_id="sess-from-result"),
         )
-        result_msg = MagicMock()
-        result_msg.result = "ok"
-        result_msg.is_error = False
-        result_msg.num_turns = 1
-        result_msg.duration_ms = 100
-        result_msg.session_id = "sess-from-result"
-
-        with (
-            patch(
-                "claude_slack_bot.claude_runner.query",
-                return_value=_async_gen(init_msg, result_msg),
-            ),
-            patch(
-                "claude_slack_bot.claude_runner.ResultMessage",
-                new=type(result_msg),
-            ),
-        ):
-            result = await run_claude("hello", "/tmp/project")
 
         assert result.session_id == "sess-from-result"
 
-    @pytest.mark.asyncio
-    async def test_session_id_passed_as_resume_option(self):
-        result_msg = MagicMock()
-        result_msg.result = "ok"
-        result_msg.is_error = False
-        result_msg.num_turns = 1
-        result_msg.duration_ms = 100
-        result_msg.session_id = "sess-resumed"
-
-        with (
-            patch(
-                "claude_slack_bot.claude_runner.query",
-                return_value=_async_gen(result_msg),
-            ),
-            patch(
-                "claude_slack_bot.claude_runner.ResultMessage",
-                new=type(result_msg),
-            ),
-            patch(
-                "claude_slack_bot.claude_runner.ClaudeAgentOptions",
-                wraps=ClaudeAgentOptions,
-            ) as mock_options_cls,
-        ):
-            await run_claude("hello", "/tmp/project", session_id="sess-existing")
-
-        call_kwargs = mock_options_cls.call_args[1]
+    async def test_session_id_passed_as_resume_option(self, mocked_runner, options_spy):
+        await mocked_runner.run(
+            _FakeResult(session_id="sess-resumed"),
+            session_id="sess-existing",
+        )
+
+        call_kwargs = options_spy.call_args[1]
         assert call_kwargs["resume"] == "sess-existing"
 
-    @pytest.mark.asyncio
-    async def test_no_session_id_sets_resume_to_none(self):
-        result_msg = MagicMock()
-        result_msg.result = "ok"
-        result_msg.is_error = False
-        result_msg.num_turns = 1
-        result_msg.duration_ms = 100
-        result_msg.session_id = ""
-
-        with (
-            patch(
-                "claude_slack_bot.claude_runner.query",
-                return_value=_async_gen(result_msg),
-            ),
-            patch(
-                "claude_slack_bot.claude_runner.ResultMessage",
-                new=type(result_msg),
-            ),
-            patch(
-                "claude_slack_bot.claude_runner.ClaudeAgentOptions",
-                wraps=ClaudeAgentOptions,
-            ) as mock_options_cls,
-        ):
-            await run_claude("hello", "/tmp/project", session_id="")
-
-        call_kwargs = mock_options_cls.call_args[1]
+    async def test_no_session_id_sets_resume_to_none(self, mocked_runner, options_spy):
+        await mocked_runner.run(_FakeResult(), session_id="")
+
+        call_kwargs = options_spy.call_args[1]
         assert call_kwargs["resume"] is None
+
+    async def test_assistant_text_streamed_to_callback(self, mocked_runner):
+        assistant_msg = AssistantMessage(
+            content=[TextBlock(text="Looking at it"), TextBlock(text="Found it")],
+            model="claude-sonnet-4-6",
+        )
+        on_text = AsyncMock()
+
+        result = await mocked_runner.run(
+            assistant_msg,
+            _FakeResult(),
+            on_text=on_text,
+        )
+
+        on_text.assert_awaited_once_with("Looking at it\n\nFound it")
+        assert result.output == "ok"
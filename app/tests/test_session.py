@@ -1,9 +1,22 @@
 # type: ignore
 import asyncio
 
-import pytest
+from claude_slack_bot.session import (
+    EventDeduplicator,
+    SessionQueue,
+    SessionStore,
+    _session_key,
+)
 
-from claude_slack_bot.session import SessionQueue, SessionStore
+
+class TestSessionKey:
+    def test_equal_inputs_return_same_object(self):
+        channel = "".join(["C0", "01"])
+
+        assert _session_key(channel, "123.456") is _session_key("C001", "123.456")
+
+    def test_distinguishes_channel_and_thread_boundaries(self):
+        assert _session_key("C0", "01123.456") != _session_key("C001", "123.456")
 
 
 class TestSessionStore:
@@ -45,9 +58,58 @@ class TestSessionStore:
 
         assert store.get("C001", "123.456") == "sess-new"
 
+    def test_least_recently_used_session_evicted(self):
+        store = SessionStore(max_sessions=2)
+
+        store.set("C001", "111.000", "sess-first")
+        store.set("C001", "222.000", "sess-second")
+        store.get("C001", "111.000")
+        store.set("C001", "333.000", "sess-third")
+
+        assert store.get("C001", "111.000") == "sess-first"
+        assert store.get("C001", "222.000") is None
+        assert store.get("C001", "333.000") == "sess-third"
+
+
+class TestEventDeduplicator:
+    def test_first_sighting_is_not_duplicate(self):
+        dedup = EventDeduplicator()
+
+        assert dedup.check_and_add("C001", "123.456") is False
+
+    def test_repeat_sighting_is_duplicate(self):
+        dedup = EventDeduplicator()
+
+        dedup.check_and_add("C001", "123.456")
+
+        assert dedup.check_and_add("C001", "123.456") is True
+
+    def test_different_channels_are_distinct(self):
+        dedup = EventDeduplicator()
+
+        dedup.check_and_add("C001", "123.456")
+
+        assert dedup.check_and_add("C002", "123.456") is False
+
+    def test_expired_entries_are_forgotten(self):
+        dedup = EventDeduplicator(ttl_seconds=0.0)
+
+        dedup.check_and_add("C001", "123.456")
+
+        assert dedup.check_and_add("C001", "123.456") is False
+
+    def test_oldest_entries_evicted_beyond_max_size(self):
+        dedup = EventDeduplicator(max_size=2)
+
+        dedup.check_and_add("C001", "1.0")
+        dedup.check_and_add("C001", "2.0")
+        dedup.check_and_add("C001", "3.0")
+
+        assert dedup.check_and_add("C001", "1.0") is False
+        assert dedup.check_and_add("C001", "3.0") is True
+
 
 class TestSessionQueue:
-    @pytest.mark.asyncio
     async def test_enqueue_executes_job(self):
         queue = SessionQueue()
         executed = []
@@ -55,12 +117,11 @@ class TestSessionQueue:
         async def job():
             executed.append(True)
 
-        await queue.enqueue("C001", "123.456", job)
+        await queue.enqueue("C001", "123.456", job())
         await asyncio.sleep(0.05)
 
         assert executed == [True]
 
-    @pytest.mark.asyncio
     async def test_jobs_for_same_session_run_serially(self):
         queue = SessionQueue()
         order = []
@@ -76,13 +137,29 @@ class TestSessionQueue:
         job_a = await make_job("a", 0.05)
         job_b = await make_job("b", 0.01)
 
-        await queue.enqueue("C001", "123.456", job_a)
-        await queue.enqueue("C001", "123.456", job_b)
+        await queue.enqueue("C001", "123.456", job_a())
+        await queue.enqueue("C001", "123.456", job_b())
         await asyncio.sleep(0.15)
 
         assert order == ["a-start", "a-end", "b-start", "b-end"]
 
-    @pytest.mark.asyncio
+    async def test_enqueue_does_not_wait_for_running_job(self):
+        queue = SessionQueue()
+        release = asyncio.Event()
+
+        async def blocking_job():
+            await release.wait()
+
+        await queue.enqueue("C001", "123.456", blocking_job())
+        await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(
+            queue.enqueue("C001", "123.456", blocking_job()),
+            timeout=0.1,
+        )
+
+        release.set()
+
     async def test_jobs_for_different_sessions_run_concurrently(self):
         queue = SessionQueue()
         order = []
@@ -98,27 +175,93 @@ class TestSessionQueue:
         job_a = await make_job("a", 0.05)
         job_b = await make_job("b", 0.05)
 
-        await queue.enqueue("C001", "111.000", job_a)
-        await queue.enqueue("C001", "222.000", job_b)
+        await queue.enqueue("C001", "111.000", job_a())
+        await queue.enqueue("C001", "222.000", job_b())
         await asyncio.sleep(0.15)
 
         assert order[0] == "a-start"
         assert order[1] == "b-start"
 
-    @pytest.mark.asyncio
     async def test_idle_queue_cleaned_up(self):
-        queue = SessionQueue()
+        queue = SessionQueue(idle_timeout=0.01)
 
         async def job():
             pass
 
-        await queue.enqueue("C001", "123.456", job)
+        await queue.enqueue("C001", "123.456", job())
         await asyncio.sleep(0.05)
 
-        assert ("C001", "123.456") not in queue._queues
-        assert ("C001", "123.456") not in queue._consumers
+        assert queue._lanes == {}
+
+    async def test_consumer_reused_across_bursts(self):
+        queue = SessionQueue()
+
+        async def job():
+            pass
+
+        await queue.enqueue("C001", "123.456", job())
+        await asyncio.sleep(0.01)
+        consumer = queue._lanes[_session_key("C001", "123.456")].consumer
+
+        await queue.enqueue("C001", "123.456", job())
+        await asyncio.sleep(0.01)
+
+        lane = queue._lanes[_session_key("C001", "123.456")]
+
+        assert lane.consumer is consumer
+        assert not lane.jobs
+        assert not lane.running
+
+        await queue.close()
+
+        assert consumer.done()
+
+        assert queue._lanes == {}
+
+    async def test_close_waits_for_pending_jobs(self):
+        queue = SessionQueue()
+        executed = []
+
+        async def job(name):
+            await asyncio.sleep(0.01)
+            executed.append(name)
+
+        await queue.enqueue("C001", "123.456", job("a"))
+        await queue.enqueue("C001", "123.456", job("b"))
+        await queue.enqueue("C002", "123.456", job("c"))
+        await queue.close()
+
+        assert sorted(executed) == ["a", "b", "c"]
+        assert queue._lanes == {}
+
+    async def test_close_cancels_jobs_that_outlive_timeout(self):
+        queue = SessionQueue()
+        started = asyncio.Event()
+        cancelled = []
+
+        async def hung_job():
+            started.set()
+
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def pending_job():
+            pass
+
+        await queue.enqueue("C001", "123.456", hung_job())
+        pending = pending_job()
+        await queue.enqueue("C001", "123.456", pending)
+        await started.wait()
+
+        await queue.close(timeout=0.01)
+
+        assert cancelled == [True]
+        assert pending.cr_frame is None
+        assert queue._lanes == {}
 
-    @pytest.mark.asyncio
     async def test_failed_job_does_not_block_next(self):
         queue = SessionQueue()
         executed = []
@@ -129,8 +272,30 @@ class TestSessionQueue:
         async def good_job():
             executed.append(True)
 
-        await queue.enqueue("C001", "123.456", failing_job)
-        await queue.enqueue("C001", "123.456", good_job)
+        await queue.enqueue("C001", "123.456", failing_job())
+        await queue.enqueue("C001", "123.456", good_job())
         await asyncio.sleep(0.05)
 
         assert executed == [True]
+
+    async def test_enqueue_rejects_job_when_full(self):
+        queue = SessionQueue(max_depth=2)
+        release = asyncio.Event()
+
+        async def blocking_job():
+            await release.wait()
+
+        assert await queue.enqueue("C001", "123.456", blocking_job())
+        await asyncio.sleep(0.01)
+        assert await queue.enqueue("C001", "123.456", blocking_job())
+
+        rejected = blocking_job()
+
+        assert not await queue.enqueue("C001", "123.456", rejected)
+        assert rejected.cr_frame is None
+        assert await queue.enqueue("C001", "999.000", blocking_job())
+
+        release.set()
+        await asyncio.sleep(0.01)
+
+        assert await queue.enqueue("C001", "123.456", blocking_job())
@@ -14,7 +14,7 @@ source "$APP_DIR/.venv/bin/activate"
 # Required environment variables
 export SLACK_BOT_TOKEN="${SLACK_BOT_TOKEN:?SLACK_BOT_TOKEN is not set}"
 export SLACK_APP_TOKEN="${SLACK_APP_TOKEN:?SLACK_APP_TOKEN is not set}"
-export SLACK_ALLOWED_USERS="${SLACK_ALLOWED_USERS:?SLACK_ALLOWED_USERS is not set}"
+export SLACK_ALLOWED_USERS="${SLACK_ALLOWED_USERS:-${SLACK_ADMIN_USER:?SLACK_ALLOWED_USERS is not set}}"
 
 cd "$APP_DIR"
 exec python -m claude_slack_bot.main "$@"